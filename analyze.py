@@ -4,16 +4,28 @@ Memory Watch Analyzer - Generate reports from memory logs
 Analyzes memory_log.csv, swap_history.csv, and memory_leaks.log
 """
 
+import atexit
 import csv
+import heapq
+import io
 import json
+import mmap
+import os
+import re
 import sqlite3
 import sys
 from collections import defaultdict
-from contextlib import closing
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    import pandas as pd
+except ImportError:
+    # pandas is optional: the analyzer stays usable as a stdlib-only script,
+    # but picks up vectorized CSV ingestion when pandas is installed.
+    pd = None
+
 LOG_DIR = Path.home() / "MemoryWatch"
 DATA_DIR = LOG_DIR / "data"
 DB_FILE = DATA_DIR / "memorywatch.sqlite"
@@ -25,8 +37,37 @@ EVENTS_FILE = LOG_DIR / "events.log"
 
 
 def parse_timestamp(ts: str) -> datetime:
-    """Parse timestamp from logs"""
-    return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S")
+    """Parse a "%Y-%m-%d %H:%M:%S" timestamp from logs.
+
+    The format is fixed, so the fields are sliced out directly instead of
+    going through strptime, which re-interprets the format string on every
+    call. Malformed input raises ValueError just as strptime did.
+    """
+    return datetime(
+        int(ts[0:4]), int(ts[5:7]), int(ts[8:10]),
+        int(ts[11:13]), int(ts[14:16]), int(ts[17:19]),
+    )
+
+
+_TS_CACHE: Dict[str, datetime] = {}
+_TS_CACHE_MAX = 100_000
+
+
+def _parse_ts_cached(ts: str) -> datetime:
+    """Memoized parse_timestamp for the CSV loops.
+
+    Monitoring logs repeat the same second-resolution timestamp across many
+    rows, so caching by raw string avoids most strptime calls. The cache is
+    cleared if it ever grows past _TS_CACHE_MAX (logs spanning very long
+    horizons), which keeps memory bounded without per-entry bookkeeping.
+    """
+    parsed = _TS_CACHE.get(ts)
+    if parsed is None:
+        if len(_TS_CACHE) >= _TS_CACHE_MAX:
+            _TS_CACHE.clear()
+        parsed = parse_timestamp(ts)
+        _TS_CACHE[ts] = parsed
+    return parsed
 
 
 def minutes_to_hhmm(minutes: int) -> str:
@@ -36,227 +77,432 @@ def minutes_to_hhmm(minutes: int) -> str:
     return f"{hours:02d}:{mins:02d}"
 
 
-def analyze_memory_trends(hours: int = 24, conn: Optional[sqlite3.Connection] = None) -> List[Dict]:
-    """Analyze memory usage trends over the last N hours"""
+def _window_start(hours: int, now: Optional[datetime] = None) -> datetime:
+    """Start of the lookback window, anchored at `now` when provided.
+
+    generate_report threads one shared `now` through every section so the
+    whole report filters against the same instant instead of re-reading the
+    clock per query.
+    """
+    if now is None:
+        now = datetime.now()
+    return now - timedelta(hours=hours)
+
+
+def analyze_memory_trends(hours: int = 24, conn: Optional[sqlite3.Connection] = None,
+                          limit: int = 10, now: Optional[datetime] = None) -> List[Dict]:
+    """Analyze memory usage trends over the last N hours.
+
+    Returns at most `limit` processes, ordered by absolute growth.
+    """
+    if conn is None:
+        conn = db_connection()
     if conn is not None:
-        return _analyze_memory_trends_sqlite(conn, hours)
-    if DB_FILE.exists():
-        with closing(sqlite3.connect(DB_FILE)) as db:
-            return _analyze_memory_trends_sqlite(db, hours)
-    return _analyze_memory_trends_csv(hours)
+        return _analyze_memory_trends_sqlite(conn, hours, limit, now)
+    return _analyze_memory_trends_csv(hours, limit, now)
 
 
-def _analyze_memory_trends_sqlite(conn: sqlite3.Connection, hours: int) -> List[Dict]:
-    cutoff_ts = (datetime.now() - timedelta(hours=hours)).timestamp()
-    process_data = defaultdict(lambda: {"max_rss": 0, "samples": [], "cmd": ""})
+def _analyze_memory_trends_sqlite(conn: sqlite3.Connection, hours: int, limit: int = 10,
+                                  now: Optional[datetime] = None) -> List[Dict]:
+    cutoff_ts = _window_start(hours, now).timestamp()
 
+    # Aggregate per pid inside SQLite so a single row per process crosses
+    # the Python boundary instead of one tuple per sample.
     query = """
-        SELECT ps.pid,
-               ps.name,
-               ps.memory_mb,
-               s.timestamp
-        FROM process_samples ps
-        JOIN snapshots s ON ps.snapshot_id = s.id
-        WHERE s.timestamp >= ?
-        ORDER BY s.timestamp ASC
+        WITH windowed AS (
+            SELECT ps.pid,
+                   FIRST_VALUE(ps.memory_mb) OVER w AS first_rss,
+                   LAST_VALUE(ps.memory_mb) OVER w AS last_rss,
+                   LAST_VALUE(ps.name) OVER w AS name,
+                   MAX(ps.memory_mb) OVER w AS max_rss,
+                   COUNT(*) OVER w AS n,
+                   ROW_NUMBER() OVER (PARTITION BY ps.pid ORDER BY s.timestamp) AS rn
+            FROM process_samples ps
+            JOIN snapshots s ON ps.snapshot_id = s.id
+            WHERE s.timestamp >= ?
+            WINDOW w AS (PARTITION BY ps.pid ORDER BY s.timestamp
+                         ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+        )
+        SELECT pid, name, first_rss, last_rss, max_rss, n
+        FROM windowed
+        WHERE rn = 1 AND n >= 2
     """
 
-    for pid, name, memory_mb, ts in conn.execute(query, (cutoff_ts,)):
-        timestamp = datetime.fromtimestamp(ts)
-        process_data[pid]["samples"].append((timestamp, memory_mb))
-        process_data[pid]["max_rss"] = max(process_data[pid]["max_rss"], memory_mb)
-        process_data[pid]["cmd"] = name
-
     results: List[Dict] = []
-    for pid, data in process_data.items():
-        if len(data["samples"]) < 2:
-            continue
-
-        samples = sorted(data["samples"], key=lambda x: x[0])
-        first_rss = samples[0][1]
-        last_rss = samples[-1][1]
+    for pid, name, first_rss, last_rss, max_rss, n in conn.execute(query, (cutoff_ts,)):
         growth = last_rss - first_rss
         growth_pct = (growth / first_rss * 100) if first_rss > 0 else 0
 
         results.append({
             "pid": pid,
-            "command": data["cmd"],
+            "command": name,
             "first_rss": first_rss,
             "last_rss": last_rss,
-            "max_rss": data["max_rss"],
+            "max_rss": max_rss,
             "growth_mb": growth,
             "growth_pct": growth_pct,
-            "samples": len(samples),
+            "samples": n,
         })
 
-    return sorted(results, key=lambda x: x["growth_mb"], reverse=True)
+    return heapq.nlargest(limit, results, key=lambda x: x["growth_mb"])
 
 
-def _analyze_memory_trends_csv(hours: int) -> List[Dict]:
+def _analyze_memory_trends_csv(hours: int, limit: int = 10,
+                               now: Optional[datetime] = None) -> List[Dict]:
     if not CSV_FILE.exists():
         return []
-
-    cutoff = datetime.now() - timedelta(hours=hours)
-    process_data = defaultdict(lambda: {"max_rss": 0, "samples": [], "cmd": ""})
+    if pd is not None:
+        return _analyze_memory_trends_pandas(hours, limit, now)
+
+    # "%Y-%m-%d %H:%M:%S" strings sort lexicographically in chronological
+    # order, so rows outside the window are rejected on the raw string and
+    # never hit the datetime parser. The watcher appends rows in
+    # chronological order, so first/last rss fall out of the scan directly
+    # and only scalar state is kept per pid — no sample list, no sort.
+    cutoff_str = _window_start(hours, now).strftime("%Y-%m-%d %H:%M:%S")
+    # Per-pid state lives in a flat list [first_rss, last_rss, max_rss,
+    # samples, cmd]: list indexing skips the hashing that per-row dict key
+    # lookups would cost in this loop.
+    process_data: Dict[str, list] = defaultdict(lambda: [None, 0.0, 0.0, 0, ""])
 
     with open(CSV_FILE) as f:
-        reader = csv.DictReader(f)
+        # csv.reader with fixed column indices avoids DictReader's
+        # per-row dict allocation.
+        reader = csv.reader(f)
+        try:
+            header = next(reader)
+            ts_i = header.index("timestamp")
+            pid_i = header.index("pid")
+            rss_i = header.index("rss_mb")
+            cmd_i = header.index("command")
+        except (StopIteration, ValueError):
+            return []
+
+        # Bound once outside the loop; global/builtin lookups per row add up
+        # over million-line logs.
+        get_state = process_data.__getitem__
+        _float = float
+
         for row in reader:
             try:
-                ts = parse_timestamp(row["timestamp"])
-                if ts < cutoff:
+                ts = row[ts_i]
+                if len(ts) != 19 or ts < cutoff_str:
                     continue
 
-                pid = row["pid"]
-                rss_mb = float(row["rss_mb"])
-                cmd = row["command"]
-
-                process_data[pid]["samples"].append((ts, rss_mb))
-                process_data[pid]["max_rss"] = max(process_data[pid]["max_rss"], rss_mb)
-                process_data[pid]["cmd"] = cmd
-            except (ValueError, KeyError):
+                rss_mb = _float(row[rss_i])
+
+                data = get_state(row[pid_i])
+                if data[0] is None:
+                    data[0] = rss_mb
+                data[1] = rss_mb
+                if rss_mb > data[2]:
+                    data[2] = rss_mb
+                data[3] += 1
+                data[4] = row[cmd_i]
+            except (ValueError, IndexError):
                 continue
 
     results = []
-    for pid, data in process_data.items():
-        if len(data["samples"]) < 2:
+    for pid, (first_rss, last_rss, max_rss, samples, cmd) in process_data.items():
+        if samples < 2:
             continue
 
-        samples = sorted(data["samples"], key=lambda x: x[0])
-        first_rss = samples[0][1]
-        last_rss = samples[-1][1]
         growth = last_rss - first_rss
         growth_pct = (growth / first_rss * 100) if first_rss > 0 else 0
 
         results.append({
             "pid": pid,
-            "command": data["cmd"],
+            "command": cmd,
             "first_rss": first_rss,
             "last_rss": last_rss,
-            "max_rss": data["max_rss"],
+            "max_rss": max_rss,
             "growth_mb": growth,
             "growth_pct": growth_pct,
-            "samples": len(samples),
+            "samples": samples,
         })
 
-    return sorted(results, key=lambda x: x["growth_mb"], reverse=True)
+    return heapq.nlargest(limit, results, key=lambda x: x["growth_mb"])
+
+
+def _analyze_memory_trends_pandas(hours: int, limit: int = 10,
+                                  now: Optional[datetime] = None) -> List[Dict]:
+    """Vectorized variant of _analyze_memory_trends_csv (pandas installed)."""
+    cutoff = _window_start(hours, now)
+    try:
+        df = pd.read_csv(
+            CSV_FILE,
+            usecols=["timestamp", "pid", "rss_mb", "command"],
+            dtype={"pid": str, "command": str},
+            on_bad_lines="skip",
+        )
+    except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        return []
 
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    df["rss_mb"] = pd.to_numeric(df["rss_mb"], errors="coerce")
+    df = df.dropna(subset=["timestamp", "rss_mb"])
+    df = df[df["timestamp"] >= cutoff]
+    if df.empty:
+        return []
 
-def analyze_swap_usage(hours: int = 24, conn: Optional[sqlite3.Connection] = None) -> Dict:
-    """Analyze swap usage patterns"""
+    df = df.sort_values("timestamp", kind="stable")
+    grouped = df.groupby("pid", sort=False).agg(
+        first_rss=("rss_mb", "first"),
+        last_rss=("rss_mb", "last"),
+        max_rss=("rss_mb", "max"),
+        samples=("rss_mb", "size"),
+        cmd=("command", "last"),
+    )
+    grouped = grouped[grouped["samples"] >= 2]
+
+    results = []
+    for pid, row in grouped.iterrows():
+        first_rss = float(row["first_rss"])
+        last_rss = float(row["last_rss"])
+        growth = last_rss - first_rss
+        growth_pct = (growth / first_rss * 100) if first_rss > 0 else 0
+
+        results.append({
+            "pid": pid,
+            "command": row["cmd"],
+            "first_rss": first_rss,
+            "last_rss": last_rss,
+            "max_rss": float(row["max_rss"]),
+            "growth_mb": growth,
+            "growth_pct": growth_pct,
+            "samples": int(row["samples"]),
+        })
+
+    return heapq.nlargest(limit, results, key=lambda x: x["growth_mb"])
+
+
+def analyze_swap_usage(hours: int = 24, conn: Optional[sqlite3.Connection] = None,
+                       now: Optional[datetime] = None) -> Dict:
+    """Analyze swap usage patterns.
+
+    Returns the aggregate stats only; callers that need the per-snapshot
+    series use get_swap_timeline.
+    """
+    if conn is None:
+        conn = db_connection()
     if conn is not None:
-        return _analyze_swap_usage_sqlite(conn, hours)
-    if DB_FILE.exists():
-        with closing(sqlite3.connect(DB_FILE)) as db:
-            return _analyze_swap_usage_sqlite(db, hours)
-    return _analyze_swap_usage_csv(hours)
+        return _analyze_swap_usage_sqlite(conn, hours, now)
+    return _analyze_swap_usage_csv(hours, now)
 
 
-def _analyze_swap_usage_sqlite(conn: sqlite3.Connection, hours: int) -> Dict:
-    cutoff_ts = (datetime.now() - timedelta(hours=hours)).timestamp()
-    swap_data = []
+def _analyze_swap_usage_sqlite(conn: sqlite3.Connection, hours: int,
+                               now: Optional[datetime] = None) -> Dict:
+    cutoff_ts = _window_start(hours, now).timestamp()
 
+    # A single aggregate row crosses the SQLite boundary instead of every
+    # snapshot in the window.
     query = """
-        SELECT timestamp,
-               swap_used_mb,
-               swap_total_mb,
-               swap_free_percent
+        SELECT AVG(swap_used_mb),
+               MAX(swap_used_mb),
+               MIN(swap_free_percent),
+               SUM(swap_used_mb),
+               COUNT(*)
         FROM snapshots
         WHERE timestamp >= ?
-        ORDER BY timestamp ASC
     """
 
-    for ts, swap_used, swap_total, swap_free_pct in conn.execute(query, (cutoff_ts,)):
-        swap_data.append({
-            "timestamp": datetime.fromtimestamp(ts),
-            "swap_mb": float(swap_used),
-            "total_mb": float(swap_total),
-            "free_pct": float(swap_free_pct),
-        })
-
-    if not swap_data:
+    avg_swap, max_swap, min_free, total_swap, samples = conn.execute(
+        query, (cutoff_ts,)).fetchone()
+    if not samples:
         return {}
 
-    avg_swap = sum(d["swap_mb"] for d in swap_data) / len(swap_data)
-    max_swap = max(d["swap_mb"] for d in swap_data)
-    min_free = min(d["free_pct"] for d in swap_data)
-    total_swap_written = sum(d["swap_mb"] for d in swap_data)
-
     return {
-        "avg_swap_mb": avg_swap,
-        "max_swap_mb": max_swap,
-        "min_free_pct": min_free,
-        "samples": len(swap_data),
-        "estimated_ssd_writes_mb": total_swap_written,
-        "swap_data": swap_data,
+        "avg_swap_mb": float(avg_swap),
+        "max_swap_mb": float(max_swap),
+        "min_free_pct": float(min_free),
+        "samples": samples,
+        "estimated_ssd_writes_mb": float(total_swap),
     }
 
 
-def _analyze_swap_usage_csv(hours: int) -> Dict:
+def _analyze_swap_usage_csv(hours: int, now: Optional[datetime] = None) -> Dict:
     if not SWAP_FILE.exists():
         return {}
+    if pd is not None:
+        return _analyze_swap_usage_pandas(hours, now)
 
-    cutoff = datetime.now() - timedelta(hours=hours)
-    swap_data = []
+    # Same lexicographic prefilter as _analyze_memory_trends_csv: only rows
+    # inside the window ever reach the datetime parser.
+    cutoff_str = _window_start(hours, now).strftime("%Y-%m-%d %H:%M:%S")
+    samples = 0
+    total_swap = 0.0
+    max_swap = float("-inf")
+    min_free = float("inf")
 
     with open(SWAP_FILE) as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        try:
+            header = next(reader)
+            ts_i = header.index("timestamp")
+            used_i = header.index("swap_used_mb")
+            free_i = header.index("free_pct")
+        except (StopIteration, ValueError):
+            return {}
+
         for row in reader:
             try:
-                ts = parse_timestamp(row["timestamp"])
-                if ts < cutoff:
+                raw_ts = row[ts_i]
+                if len(raw_ts) != 19 or raw_ts < cutoff_str:
                     continue
 
-                swap_data.append({
-                    "timestamp": ts,
-                    "swap_mb": float(row["swap_used_mb"]),
-                    "total_mb": float(row["swap_total_mb"]),
-                    "free_pct": float(row["free_pct"]),
-                })
-            except (ValueError, KeyError):
+                swap_mb = float(row[used_i])
+                free_pct = float(row[free_i])
+                samples += 1
+                total_swap += swap_mb
+                if swap_mb > max_swap:
+                    max_swap = swap_mb
+                if free_pct < min_free:
+                    min_free = free_pct
+            except (ValueError, IndexError):
                 continue
 
-    if not swap_data:
+    if not samples:
         return {}
 
-    avg_swap = sum(d["swap_mb"] for d in swap_data) / len(swap_data)
-    max_swap = max(d["swap_mb"] for d in swap_data)
-    min_free = min(d["free_pct"] for d in swap_data)
-    total_swap_written = sum(d["swap_mb"] for d in swap_data)
-
     return {
-        "avg_swap_mb": avg_swap,
+        "avg_swap_mb": total_swap / samples,
         "max_swap_mb": max_swap,
         "min_free_pct": min_free,
-        "samples": len(swap_data),
-        "estimated_ssd_writes_mb": total_swap_written,
-        "swap_data": swap_data,
+        "samples": samples,
+        "estimated_ssd_writes_mb": total_swap,
     }
 
 
-def get_memory_leaks(conn: Optional[sqlite3.Connection] = None, hours: int = 168) -> List[str]:
-    """Extract recent memory leak alerts"""
+def _analyze_swap_usage_pandas(hours: int, now: Optional[datetime] = None) -> Dict:
+    """Vectorized variant of _analyze_swap_usage_csv (pandas installed)."""
+    cutoff = _window_start(hours, now)
+    try:
+        df = pd.read_csv(
+            SWAP_FILE,
+            usecols=["timestamp", "swap_used_mb", "free_pct"],
+            on_bad_lines="skip",
+        )
+    except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        return {}
+
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    for col in ("swap_used_mb", "free_pct"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.dropna()
+    df = df[df["timestamp"] >= cutoff]
+    if df.empty:
+        return {}
+
+    used = df["swap_used_mb"]
+    return {
+        "avg_swap_mb": float(used.mean()),
+        "max_swap_mb": float(used.max()),
+        "min_free_pct": float(df["free_pct"].min()),
+        "samples": len(df),
+        "estimated_ssd_writes_mb": float(used.sum()),
+    }
+
+
+def get_swap_timeline(hours: int = 24, conn: Optional[sqlite3.Connection] = None,
+                      now: Optional[datetime] = None) -> List[Dict]:
+    """Fetch the raw per-snapshot swap series for the last N hours.
+
+    Split out of analyze_swap_usage so report generation only pays for the
+    aggregates; callers that plot or export the series opt in here.
+    """
+    if conn is None:
+        conn = db_connection()
     if conn is not None:
-        return _get_memory_leaks_sqlite(conn, hours)
-    if DB_FILE.exists():
-        with closing(sqlite3.connect(DB_FILE)) as db:
-            return _get_memory_leaks_sqlite(db, hours)
-    return _get_memory_leaks_legacy()
+        return _get_swap_timeline_sqlite(conn, hours, now)
+    return _get_swap_timeline_csv(hours, now)
+
 
+def _get_swap_timeline_sqlite(conn: sqlite3.Connection, hours: int,
+                              now: Optional[datetime] = None) -> List[Dict]:
+    cutoff_ts = _window_start(hours, now).timestamp()
 
-def _get_memory_leaks_sqlite(conn: sqlite3.Connection, hours: int) -> List[str]:
-    cutoff_ts = (datetime.now() - timedelta(hours=hours)).timestamp()
+    query = """
+        SELECT timestamp,
+               swap_used_mb,
+               swap_total_mb,
+               swap_free_percent
+        FROM snapshots
+        WHERE timestamp >= ?
+        ORDER BY timestamp ASC
+    """
+
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(ts),
+            "swap_mb": float(swap_used),
+            "total_mb": float(swap_total),
+            "free_pct": float(swap_free_pct),
+        }
+        for ts, swap_used, swap_total, swap_free_pct in conn.execute(query, (cutoff_ts,))
+    ]
+
+
+def _get_swap_timeline_csv(hours: int, now: Optional[datetime] = None) -> List[Dict]:
+    if not SWAP_FILE.exists():
+        return []
+
+    cutoff_str = _window_start(hours, now).strftime("%Y-%m-%d %H:%M:%S")
+    timeline: List[Dict] = []
+
+    with open(SWAP_FILE) as f:
+        reader = csv.reader(f)
+        try:
+            header = next(reader)
+            ts_i = header.index("timestamp")
+            used_i = header.index("swap_used_mb")
+            total_i = header.index("swap_total_mb")
+            free_i = header.index("free_pct")
+        except (StopIteration, ValueError):
+            return []
+
+        append = timeline.append
+        for row in reader:
+            try:
+                raw_ts = row[ts_i]
+                if len(raw_ts) != 19 or raw_ts < cutoff_str:
+                    continue
+
+                append({
+                    "timestamp": _parse_ts_cached(raw_ts),
+                    "swap_mb": float(row[used_i]),
+                    "total_mb": float(row[total_i]),
+                    "free_pct": float(row[free_i]),
+                })
+            except (ValueError, IndexError):
+                continue
+
+    return timeline
+
+
+def get_memory_leaks(conn: Optional[sqlite3.Connection] = None, hours: int = 168,
+                     limit: int = 200, now: Optional[datetime] = None) -> List[str]:
+    """Extract the most recent `limit` memory leak alerts"""
+    if conn is None:
+        conn = db_connection()
+    if conn is not None:
+        return _get_memory_leaks_sqlite(conn, hours, limit, now)
+    return _get_memory_leaks_legacy()[-limit:]
+
+
+def _get_memory_leaks_sqlite(conn: sqlite3.Connection, hours: int, limit: int = 200,
+                             now: Optional[datetime] = None) -> List[str]:
+    cutoff_ts = _window_start(hours, now).timestamp()
     query = """
         SELECT timestamp, type, message, pid, process_name
         FROM alerts
         WHERE timestamp >= ?
           AND type IN ('MEMORY_LEAK', 'RAPID_GROWTH')
         ORDER BY timestamp DESC
-        LIMIT 200
+        LIMIT ?
     """
 
     leaks = []
-    for ts, alert_type, message, pid, name in conn.execute(query, (cutoff_ts,)):
+    for ts, alert_type, message, pid, name in conn.execute(query, (cutoff_ts, limit)):
         timestamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
         suffix = f" PID={pid}" if pid is not None else ""
         if name:
@@ -265,95 +511,96 @@ def _get_memory_leaks_sqlite(conn: sqlite3.Connection, hours: int) -> List[str]:
     return leaks
 
 
-def get_diagnostic_hints(conn: Optional[sqlite3.Connection] = None, hours: int = 48) -> List[str]:
-    """Fetch diagnostic hint alerts"""
+def get_diagnostic_hints(conn: Optional[sqlite3.Connection] = None, hours: int = 48,
+                         limit: int = 50, now: Optional[datetime] = None) -> List[str]:
+    """Fetch the most recent `limit` diagnostic hint alerts"""
+    if conn is None:
+        conn = db_connection()
     if conn is not None:
-        return _get_diagnostic_hints_sqlite(conn, hours)
-    if DB_FILE.exists():
-        with closing(sqlite3.connect(DB_FILE)) as db:
-            return _get_diagnostic_hints_sqlite(db, hours)
+        return _get_diagnostic_hints_sqlite(conn, hours, limit, now)
     return []
 
 
-def _get_diagnostic_hints_sqlite(conn: sqlite3.Connection, hours: int) -> List[str]:
-    cutoff_ts = (datetime.now() - timedelta(hours=hours)).timestamp()
+def _get_diagnostic_hints_sqlite(conn: sqlite3.Connection, hours: int, limit: int = 50,
+                                 now: Optional[datetime] = None) -> List[str]:
+    cutoff_ts = _window_start(hours, now).timestamp()
+    # json_extract pulls the two metadata keys inside SQLite, so Python never
+    # sees the raw blob; json_valid shields malformed metadata, which simply
+    # yields no suffix.
     query = """
-        SELECT timestamp, message, pid, process_name, metadata
+        SELECT timestamp, message, pid, process_name,
+               CASE WHEN json_valid(metadata)
+                    THEN json_extract(metadata, '$.artifact_path') END,
+               CASE WHEN json_valid(metadata)
+                    THEN json_extract(metadata, '$.artifact_exists') END
         FROM alerts
         WHERE timestamp >= ?
           AND type = 'DIAGNOSTIC_HINT'
         ORDER BY timestamp DESC
-        LIMIT 50
+        LIMIT ?
     """
 
     hints = []
     try:
-        rows = list(conn.execute(query, (cutoff_ts,)))
+        rows = list(conn.execute(query, (cutoff_ts, limit)))
     except sqlite3.OperationalError:
-        rows = [tuple(row[:4] + (None,)) for row in conn.execute(
-            "SELECT timestamp, message, pid, process_name FROM alerts WHERE timestamp >= ? AND type = 'DIAGNOSTIC_HINT' ORDER BY timestamp DESC LIMIT 50",
-            (cutoff_ts,)
+        rows = [tuple(row) + (None, None) for row in conn.execute(
+            "SELECT timestamp, message, pid, process_name FROM alerts WHERE timestamp >= ? AND type = 'DIAGNOSTIC_HINT' ORDER BY timestamp DESC LIMIT ?",
+            (cutoff_ts, limit)
         )]
 
-    for ts, message, pid, name, metadata in rows:
+    for ts, message, pid, name, artifact, artifact_exists in rows:
         timestamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
         suffix = f" PID={pid}" if pid is not None else ""
         if name:
             suffix += f" process={name}"
-        if metadata:
-            try:
-                meta = json.loads(metadata)
-                artifact = meta.get("artifact_path")
-                if artifact:
-                    suffix += f" artifact={artifact}"
-                exists = meta.get("artifact_exists")
-                if exists == "false":
-                    suffix += " (missing)"
-            except json.JSONDecodeError:
-                pass
+        if artifact:
+            suffix += f" artifact={artifact}"
+        if artifact_exists == "false":
+            suffix += " (missing)"
         hints.append(f"[{timestamp}] {message}{suffix}")
     return hints
 
 
-def get_system_alerts(conn: Optional[sqlite3.Connection] = None, hours: int = 72) -> List[str]:
+def get_system_alerts(conn: Optional[sqlite3.Connection] = None, hours: int = 72,
+                      limit: int = 50, now: Optional[datetime] = None) -> List[str]:
+    if conn is None:
+        conn = db_connection()
     if conn is not None:
-        return _get_system_alerts_sqlite(conn, hours)
-    if DB_FILE.exists():
-        with closing(sqlite3.connect(DB_FILE)) as db:
-            return _get_system_alerts_sqlite(db, hours)
+        return _get_system_alerts_sqlite(conn, hours, limit, now)
     return []
 
 
-def _get_system_alerts_sqlite(conn: sqlite3.Connection, hours: int) -> List[str]:
-    cutoff_ts = (datetime.now() - timedelta(hours=hours)).timestamp()
+def _get_system_alerts_sqlite(conn: sqlite3.Connection, hours: int, limit: int = 50,
+                              now: Optional[datetime] = None) -> List[str]:
+    cutoff_ts = _window_start(hours, now).timestamp()
     query = """
-        SELECT timestamp, type, message, metadata
+        SELECT timestamp, type, message,
+               CASE WHEN json_valid(metadata)
+                    THEN json_extract(metadata, '$.swap_used_mb') END,
+               CASE WHEN json_valid(metadata)
+                    THEN json_extract(metadata, '$.swap_total_mb') END,
+               CASE WHEN json_valid(metadata)
+                    THEN json_extract(metadata, '$.pressure') END
         FROM alerts
         WHERE timestamp >= ?
           AND type IN ('SYSTEM_PRESSURE', 'HIGH_SWAP', 'DATASTORE_WARNING')
         ORDER BY timestamp DESC
-        LIMIT 50
+        LIMIT ?
     """
 
     alerts = []
-    for ts, alert_type, message, metadata in conn.execute(query, (cutoff_ts,)):
+    for ts, alert_type, message, used, total, pressure in conn.execute(query, (cutoff_ts, limit)):
         timestamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
-        detail_suffix = ""
-        if metadata:
-            try:
-                meta = json.loads(metadata)
-            except json.JSONDecodeError:
-                meta = {}
-            extras = []
-            if alert_type == "HIGH_SWAP":
-                if (used := meta.get("swap_used_mb")):
-                    extras.append(f"swap={used}MB")
-                if (total := meta.get("swap_total_mb")):
-                    extras.append(f"total={total}MB")
-            if (pressure := meta.get("pressure")):
-                extras.append(f"pressure={pressure}")
-            if extras:
-                detail_suffix = " (" + ", ".join(extras) + ")"
+        extras = []
+        if alert_type == "HIGH_SWAP":
+            if used:
+                extras.append(f"swap={used}MB")
+            if total:
+                extras.append(f"total={total}MB")
+        if pressure:
+            extras.append(f"pressure={pressure}")
+        detail_suffix = " (" + ", ".join(extras) + ")" if extras else ""
         alerts.append(f"[{timestamp}] {alert_type}: {message}{detail_suffix}")
     return alerts
 
@@ -368,199 +615,291 @@ def load_notification_preferences() -> Optional[Dict]:
         return None
 
 
-def get_diagnostic_artifacts(conn: Optional[sqlite3.Connection] = None, hours: int = 48) -> List[Dict]:
+def get_diagnostic_artifacts(conn: Optional[sqlite3.Connection] = None, hours: int = 48,
+                             limit: int = 200, now: Optional[datetime] = None) -> List[Dict]:
     """Collect recent diagnostic artifacts with existence metadata."""
+    if conn is None:
+        conn = db_connection()
     if conn is not None:
-        return _get_diagnostic_artifacts_sqlite(conn, hours)
-    if DB_FILE.exists():
-        with closing(sqlite3.connect(DB_FILE)) as db:
-            return _get_diagnostic_artifacts_sqlite(db, hours)
+        return _get_diagnostic_artifacts_sqlite(conn, hours, limit, now)
     return []
 
 
-def _get_diagnostic_artifacts_sqlite(conn: sqlite3.Connection, hours: int) -> List[Dict]:
-    cutoff_ts = (datetime.now() - timedelta(hours=hours)).timestamp()
+def _get_diagnostic_artifacts_sqlite(conn: sqlite3.Connection, hours: int, limit: int = 200,
+                                     now: Optional[datetime] = None) -> List[Dict]:
+    cutoff_ts = _window_start(hours, now).timestamp()
+    # The path filter and title fallback run inside SQLite, so only hint rows
+    # that actually reference an artifact cross the boundary — and without
+    # their metadata blobs.
     query = """
-        SELECT message, metadata
+        SELECT COALESCE(NULLIF(json_extract(metadata, '$.title'), ''), message),
+               json_extract(metadata, '$.artifact_path')
         FROM alerts
         WHERE timestamp >= ?
           AND type = 'DIAGNOSTIC_HINT'
+          AND json_valid(metadata)
+          AND json_extract(metadata, '$.artifact_path') IS NOT NULL
         ORDER BY timestamp DESC
         LIMIT 200
     """
 
-    artifacts: List[Dict] = []
-    seen: set = set()
+    candidates: List[tuple] = []
 
-    for message, metadata in conn.execute(query, (cutoff_ts,)):
-        if not metadata:
-            continue
+    for title, artifact_path in conn.execute(query, (cutoff_ts,)):
+        candidates.append((title, Path(artifact_path).expanduser()))
 
-        try:
-            meta = json.loads(metadata)
-        except json.JSONDecodeError:
-            continue
+    # Artifacts typically share a handful of dump directories, so one
+    # scandir per distinct parent replaces a stat syscall per artifact.
+    dir_listing: Dict[Path, set] = {}
+    for _, path in candidates:
+        parent = path.parent
+        if parent not in dir_listing:
+            try:
+                dir_listing[parent] = {entry.name for entry in os.scandir(parent)}
+            except OSError:
+                dir_listing[parent] = set()
 
-        artifact_path = meta.get("artifact_path")
-        if not artifact_path:
-            continue
+    artifacts: List[Dict] = []
+    seen: set = set()
 
-        expanded = Path(artifact_path).expanduser()
-        exists = expanded.exists()
-        title = meta.get("title") or message
-        key = (expanded, exists)
+    for title, path in candidates:
+        exists = path.name in dir_listing[path.parent]
+        # Dedupe on the string form: existence is a function of the path, and
+        # str hashing is cheaper than Path hashing.
+        key = str(path)
         if key in seen:
             continue
         seen.add(key)
         artifacts.append({
             "title": title,
-            "path": str(expanded),
+            "path": str(path),
             "exists": exists,
         })
 
     artifacts.sort(key=lambda item: item["title"])
-    return artifacts
+    # The query LIMIT stays at 200 because duplicates collapse after the
+    # fetch; the render limit applies to the deduped, sorted list.
+    return artifacts[:limit]
+
+
+_LEAK_LINE_RE = re.compile(rb"[^\n]*POTENTIAL LEAK[^\n]*")
 
 
 def _get_memory_leaks_legacy() -> List[str]:
     if not LEAKS_FILE.exists():
         return []
 
-    leaks = []
-    with open(LEAKS_FILE) as f:
-        for line in f:
-            if "POTENTIAL LEAK" in line:
-                leaks.append(line.strip())
-
-    return leaks
+    # One compiled-regex pass over an mmap scans the log in C instead of
+    # iterating Python string objects line by line.
+    with open(LEAKS_FILE, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped.
+            return []
+        with mm:
+            return [match.group().decode().strip()
+                    for match in _LEAK_LINE_RE.finditer(mm)]
 
 
 def generate_report(hours: int = 24) -> str:
     """Generate comprehensive memory analysis report"""
-    report = []
-    report.append("=" * 80)
-    report.append(f"Memory Watch Analysis Report - Last {hours} hours")
-    report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report.append("=" * 80)
-    report.append("")
+    # Stream into one buffer instead of accumulating a list of lines and
+    # paying a full copy in the final join.
+    buf = io.StringIO()
+
+    def emit(line: str = "") -> None:
+        buf.write(line)
+        buf.write("\n")
+
+    # One clock read anchors the header and every section's cutoff.
+    now = datetime.now()
+
+    emit("=" * 80)
+    emit(f"Memory Watch Analysis Report - Last {hours} hours")
+    emit(f"Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+    emit("=" * 80)
+    emit()
 
     conn = db_connection()
-    try:
-        # Memory trends
-        report.append("## Top Memory Growth Processes")
-        report.append("-" * 80)
-        trends = analyze_memory_trends(hours, conn)
-        if trends:
-            for i, proc in enumerate(trends[:10], 1):
-                report.append(
-                    f"{i:2d}. PID {proc['pid']:>6} | {proc['command']:<30} | "
-                    f"Growth: {proc['growth_mb']:>7.1f}MB ({proc['growth_pct']:>6.1f}%) | "
-                    f"Max: {proc['max_rss']:>7.1f}MB | Samples: {proc['samples']}"
-                )
-        else:
-            report.append("No data available")
-        report.append("")
-
-        # Swap analysis
-        report.append("## Swap Usage Analysis")
-        report.append("-" * 80)
-        swap = analyze_swap_usage(hours, conn)
-        if swap:
-            report.append(f"Average Swap Used:        {swap['avg_swap_mb']:.1f} MB")
-            report.append(f"Maximum Swap Used:        {swap['max_swap_mb']:.1f} MB")
-            report.append(f"Minimum Free:             {swap['min_free_pct']:.1f}%")
-            report.append(f"Est. SSD Writes:          {swap['estimated_ssd_writes_mb']:.1f} MB")
-            report.append(f"Samples:                  {swap['samples']}")
-
-            # Warn if swap usage is high
-            if swap['max_swap_mb'] > 1024:
-                report.append("")
-                report.append("⚠️  WARNING: High swap usage detected (>1GB)")
-                report.append("   This can cause SSD wear and system slowdown")
-        else:
-            report.append("No data available")
-        report.append("")
-
-        # Memory leaks
-        report.append("## Potential Memory Leaks")
-        report.append("-" * 80)
-        leaks = get_memory_leaks(conn)
-        if leaks:
-            report.append(f"Found {len(leaks)} potential leak(s):")
-            for leak in leaks[-20:]:  # Last 20 leaks
-                report.append(f"  {leak}")
-        else:
-            report.append("✓ No memory leaks detected")
-        report.append("")
-
-        # Diagnostic hints
-        report.append("## Diagnostic Suggestions")
-        report.append("-" * 80)
-        hints = get_diagnostic_hints(conn)
-        if hints:
-            for hint in hints[:15]:
-                report.append(f"  {hint}")
-        else:
-            report.append("No runtime-specific diagnostic hints recorded")
-        report.append("")
-
-        prefs = load_notification_preferences()
-        report.append("## Notification Preferences")
-        report.append("-" * 80)
-        if prefs:
-            quiet = prefs.get("quietHours")
-            if quiet:
-                start = quiet.get("startMinutes", 0)
-                end = quiet.get("endMinutes", 0)
-                tz = quiet.get("timezoneIdentifier", "local")
-                report.append(f"  Quiet hours: {minutes_to_hhmm(start)}–{minutes_to_hhmm(end)} {tz}")
-            else:
-                report.append("  Quiet hours: disabled")
-            policy = "deliver" if prefs.get("allowInterruptionsDuringQuietHours") else "hold"
-            report.append(f"  Quiet-hour policy: {policy}")
-            report.append(f"  Leak alerts: {'enabled' if prefs.get('leakNotificationsEnabled', True) else 'disabled'}")
-            report.append(f"  Pressure alerts: {'enabled' if prefs.get('pressureNotificationsEnabled', True) else 'disabled'}")
-        else:
-            report.append("  No preference file found (defaults in effect)")
-        report.append("")
-
-        system_alerts = get_system_alerts(conn)
-        report.append("## System Alerts")
-        report.append("-" * 80)
-        if system_alerts:
-            for alert in system_alerts[:20]:
-                report.append(f"  {alert}")
-        else:
-            report.append("No high-pressure or swap alerts recorded")
-        report.append("")
-
-        artifacts = get_diagnostic_artifacts(conn)
-        report.append("## Diagnostic Artifacts")
-        report.append("-" * 80)
-        if artifacts:
-            for artifact in artifacts[:20]:
-                status = "✅" if artifact["exists"] else "⚠️ missing"
-                report.append(f"  {status} {artifact['title']}: {artifact['path']}")
+
+    # Memory trends
+    emit("## Top Memory Growth Processes")
+    emit("-" * 80)
+    trends = analyze_memory_trends(hours, conn, limit=10, now=now)
+    if trends:
+        for i, proc in enumerate(trends, 1):
+            emit(
+                f"{i:2d}. PID {proc['pid']:>6} | {proc['command']:<30} | "
+                f"Growth: {proc['growth_mb']:>7.1f}MB ({proc['growth_pct']:>6.1f}%) | "
+                f"Max: {proc['max_rss']:>7.1f}MB | Samples: {proc['samples']}"
+            )
+    else:
+        emit("No data available")
+    emit()
+
+    # Swap analysis
+    emit("## Swap Usage Analysis")
+    emit("-" * 80)
+    swap = analyze_swap_usage(hours, conn, now=now)
+    if swap:
+        emit(f"Average Swap Used:        {swap['avg_swap_mb']:.1f} MB")
+        emit(f"Maximum Swap Used:        {swap['max_swap_mb']:.1f} MB")
+        emit(f"Minimum Free:             {swap['min_free_pct']:.1f}%")
+        emit(f"Est. SSD Writes:          {swap['estimated_ssd_writes_mb']:.1f} MB")
+        emit(f"Samples:                  {swap['samples']}")
+
+        # Warn if swap usage is high
+        if swap['max_swap_mb'] > 1024:
+            emit()
+            emit("⚠️  WARNING: High swap usage detected (>1GB)")
+            emit("   This can cause SSD wear and system slowdown")
+    else:
+        emit("No data available")
+    emit()
+
+    # Memory leaks
+    emit("## Potential Memory Leaks")
+    emit("-" * 80)
+    leaks = get_memory_leaks(conn, limit=20, now=now)
+    if leaks:
+        emit(f"Found {len(leaks)} potential leak(s):")
+        for leak in leaks:
+            emit(f"  {leak}")
+    else:
+        emit("✓ No memory leaks detected")
+    emit()
+
+    # Diagnostic hints
+    emit("## Diagnostic Suggestions")
+    emit("-" * 80)
+    hints = get_diagnostic_hints(conn, limit=15, now=now)
+    if hints:
+        for hint in hints:
+            emit(f"  {hint}")
+    else:
+        emit("No runtime-specific diagnostic hints recorded")
+    emit()
+
+    prefs = load_notification_preferences()
+    emit("## Notification Preferences")
+    emit("-" * 80)
+    if prefs:
+        quiet = prefs.get("quietHours")
+        if quiet:
+            start = quiet.get("startMinutes", 0)
+            end = quiet.get("endMinutes", 0)
+            tz = quiet.get("timezoneIdentifier", "local")
+            emit(f"  Quiet hours: {minutes_to_hhmm(start)}–{minutes_to_hhmm(end)} {tz}")
         else:
-            report.append("No artifacts persisted yet.")
-        report.append("")
+            emit("  Quiet hours: disabled")
+        policy = "deliver" if prefs.get("allowInterruptionsDuringQuietHours") else "hold"
+        emit(f"  Quiet-hour policy: {policy}")
+        emit(f"  Leak alerts: {'enabled' if prefs.get('leakNotificationsEnabled', True) else 'disabled'}")
+        emit(f"  Pressure alerts: {'enabled' if prefs.get('pressureNotificationsEnabled', True) else 'disabled'}")
+    else:
+        emit("  No preference file found (defaults in effect)")
+    emit()
+
+    system_alerts = get_system_alerts(conn, limit=20, now=now)
+    emit("## System Alerts")
+    emit("-" * 80)
+    if system_alerts:
+        for alert in system_alerts:
+            emit(f"  {alert}")
+    else:
+        emit("No high-pressure or swap alerts recorded")
+    emit()
+
+    artifacts = get_diagnostic_artifacts(conn, limit=20, now=now)
+    emit("## Diagnostic Artifacts")
+    emit("-" * 80)
+    if artifacts:
+        for artifact in artifacts:
+            status = "✅" if artifact["exists"] else "⚠️ missing"
+            emit(f"  {status} {artifact['title']}: {artifact['path']}")
+    else:
+        emit("No artifacts persisted yet.")
+    emit()
+
+    # Final rule written without the trailing newline so the returned string
+    # matches the old "\n".join output byte for byte.
+    buf.write("=" * 80)
+
+    return buf.getvalue()
+
+
+def _ensure_indexes(conn: sqlite3.Connection) -> None:
+    """Create the analyzer's read-path indexes if they are missing.
+
+    The Swift store already indexes snapshots(timestamp) and
+    alerts(timestamp); the composite alerts index (cutoff filter plus the
+    type IN (...) predicates) and the process_samples join index are only
+    needed by this analyzer, so they are created lazily here.
+    """
+    try:
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots(timestamp)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_alerts_timestamp_type ON alerts(timestamp, type)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_process_samples_snapshot_id"
+            " ON process_samples(snapshot_id)")
+        # Covering index for the trends join: process_samples rows resolve
+        # their snapshot timestamp from the index alone instead of a b-tree
+        # lookup into the snapshots table per sample row.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_snapshots_id_timestamp"
+            " ON snapshots(id, timestamp)")
+    except sqlite3.OperationalError:
+        # Empty database or read-only file: queries fall back to whatever
+        # indexes already exist.
+        pass
 
-        report.append("=" * 80)
-    finally:
-        if conn is not None:
-            conn.close()
 
-    return "\n".join(report)
+_SHARED_CONN: Optional[sqlite3.Connection] = None
 
 
 def db_connection() -> Optional[sqlite3.Connection]:
+    """Return the shared analyzer connection, opening it on first use.
+
+    One long-lived connection amortizes the open/pragma/index setup across
+    report sections — and across reports when the module is imported by a
+    service. sqlite3 also caches compiled statements per connection, so
+    repeated section queries skip SQL parsing. The connection is closed
+    automatically at interpreter exit.
+    """
+    global _SHARED_CONN
+    if _SHARED_CONN is not None:
+        return _SHARED_CONN
     if DB_FILE.exists():
-        conn = sqlite3.connect(DB_FILE)
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        # Read-tuned pragmas, mirroring the ones the Swift store sets on its
+        # side: WAL keeps the reader from blocking the daemon's writes, the
+        # larger page cache and in-memory temp store keep the sort/group
+        # queries from spilling to disk, and mmap avoids read syscalls.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-50000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        _ensure_indexes(conn)
+        _SHARED_CONN = conn
         return conn
     return None
 
 
+def _close_shared_conn() -> None:
+    global _SHARED_CONN
+    if _SHARED_CONN is not None:
+        _SHARED_CONN.close()
+        _SHARED_CONN = None
+
+
+atexit.register(_close_shared_conn)
+
+
 def main():
     """Main entry point"""
     hours = 24